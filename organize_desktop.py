@@ -1,16 +1,43 @@
 import os
+import re
+import mmap
+import sys
+import errno
 import shutil
 import json
 import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime
 
+# 优先使用 orjson（C 实现，直接输出 UTF-8 字节，可直接解析内存映射），未安装时回退到标准库 json
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+    def _loads(data):
+        # 标准库 json 不接受 memoryview，需要转为 bytes
+        return json.loads(bytes(data))
+
+# 桌面路径与恢复日志路径（只解析一次）
+DESKTOP_PATH = os.path.join(os.path.expanduser('~'), 'Desktop')
+BACKUP_LOG_PATH = os.path.join(DESKTOP_PATH, "文件整理备份.json")
+
 # ======================
 # 配置系统 (可外部修改)
 # ======================
-DEFAULT_CONFIG = {
-    "skip_files": [".ini", ".db", ".tmp", "~$"],  # 跳过系统/临时文件
-    "backup_log": True,  # 是否创建恢复日志
-    "categories": {
+@dataclass(frozen=True, slots=True)
+class Config:
+    """整理配置（不可变，外部配置通过 replace 生成新实例）"""
+    skip_files: tuple = (".ini", ".db", ".tmp", "~$")  # 跳过系统/临时文件
+    backup_log: bool = True  # 是否创建恢复日志
+    silent_mode: bool = False  # 静默模式（无需确认）
+    categories: dict = field(default_factory=lambda: {
         "图片": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"],
         "文档": [".pdf", ".docx", ".doc", ".xlsx", ".pptx", ".txt"],
         "压缩包": [".zip", ".rar", ".7z", ".tar", ".gz"],
@@ -18,133 +45,249 @@ DEFAULT_CONFIG = {
         "可执行文件": [".exe", ".msi", ".bat", ".cmd"],
         "快捷方式": [".lnk", ".url", ".desktop"],
         "媒体": [".mp3", ".mp4", ".avi", ".mov", ".wav"]
-    }
-}
+    })
+
+CONFIG_FIELDS = frozenset(f.name for f in fields(Config))
+
+# 控制台输出每累积多少行刷新一次
+OUTPUT_FLUSH_LINES = 256
+# 并发移动文件的线程数（重命名为 I/O 操作，会释放 GIL）
+MOVE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 # ======================
 # 核心功能函数
 # ======================
 def load_config(config_path=None):
     """加载配置文件，优先使用外部配置"""
-    config = DEFAULT_CONFIG.copy()
+    config = Config()
     
-    if config_path and os.path.exists(config_path):
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                user_config = json.load(f)
-                # 深度合并配置
-                for key in user_config:
-                    if key in config and isinstance(config[key], dict):
-                        config[key].update(user_config[key])
-                    else:
-                        config[key] = user_config[key]
-        except Exception as e:
-            print(f"⚠️ 配置文件错误: {e}, 使用默认配置")
+    # 未指定外部配置时直接返回默认配置
+    if not config_path or not os.path.exists(config_path):
+        return config
+    
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            user_config = json.load(f)
+        # 深度合并配置（分类表合并到默认分类，其余字段直接覆盖）
+        overrides = {k: v for k, v in user_config.items() if k in CONFIG_FIELDS}
+        if 'categories' in overrides:
+            overrides['categories'] = {**config.categories, **overrides['categories']}
+        if 'skip_files' in overrides:
+            overrides['skip_files'] = tuple(overrides['skip_files'])
+        config = replace(config, **overrides)
+    except Exception as e:
+        print(f"⚠️ 配置文件错误: {e}, 使用默认配置")
     
     return config
 
-def should_skip_file(filename, skip_patterns):
+def compile_skip_patterns(skip_patterns):
+    """将跳过规则编译为 (后缀元组, 子串正则)，只需计算一次
+
+    以 "." 开头的规则只匹配文件名结尾（如 ".tmp" 不再跳过 report.tmp.docx），
+    其余规则匹配文件名中任意位置（如 "~$"）。
+    """
+    suffixes = tuple(p for p in skip_patterns if p.startswith('.'))
+    substrs = [p for p in skip_patterns if not p.startswith('.')]
+    skip_re = re.compile('|'.join(map(re.escape, substrs))) if substrs else None
+    return suffixes, skip_re
+
+def should_skip_file(filename, suffixes, skip_re):
     """检查是否应跳过文件"""
     lower_name = filename.lower()
-    # 跳过系统文件和临时文件
-    for pattern in skip_patterns:
-        if pattern.startswith('.') and lower_name.endswith(pattern):
-            return True
-        if pattern in lower_name:
-            return True
-    return False
+    # 跳过系统文件（后缀匹配）和临时文件（子串匹配）
+    return lower_name.endswith(suffixes) or (
+        skip_re is not None and skip_re.search(lower_name) is not None
+    )
+
+def move_file(src_path, dst_path):
+    """移动文件：同一磁盘内直接重命名，跨磁盘时回退到 shutil.move"""
+    try:
+        os.replace(src_path, dst_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src_path, dst_path)
+
+def unique_path(folder, filename):
+    """在目标文件夹中原子地占用一个不重名的路径（name, name_2, name_3 ...）
+
+    通过 O_CREAT|O_EXCL 创建空占位文件保证唯一，随后的 os.replace 会直接覆盖占位文件。
+    """
+    candidate = os.path.join(folder, filename)
+    base = ext = None
+    i = 1
+    while True:
+        try:
+            fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # 仅在发生重名时才拆分文件名
+            if base is None:
+                base, ext = os.path.splitext(filename)
+            i += 1
+            candidate = os.path.join(folder, f"{base}_{i}{ext}")
+            continue
+        os.close(fd)
+        return candidate
+
+def relocate_file(src_path, dst_folder, filename):
+    """占用不重名的目标路径后移动文件，返回实际目标路径"""
+    dst_path = unique_path(dst_folder, filename)
+    try:
+        move_file(src_path, dst_path)
+    except OSError:
+        # 移动失败时释放占位文件
+        try:
+            os.remove(dst_path)
+        except OSError:
+            pass
+        raise
+    return dst_path
+
+def open_backup_log(desktop_path):
+    """在桌面创建临时恢复日志并写入头部，返回 (文件对象, 临时路径)
+
+    整理结束后再替换到正式日志路径，避免截断或移动上一次的日志。
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix="文件整理备份.", suffix=".part", dir=desktop_path)
+    log_f = os.fdopen(fd, 'wb')
+    log_f.write(
+        b'{"timestamp": ' + _dumps(datetime.now().isoformat())
+        + b', "desktop_path": ' + _dumps(desktop_path)
+        + b', "operations": [\n'
+    )
+    return log_f, tmp_path
 
 def organize_files(config):
     """整理桌面文件主函数"""
-    desktop_path = os.path.join(os.path.expanduser('~'), 'Desktop')
+    desktop_path = DESKTOP_PATH
     
     # 用户确认
-    if not config.get('silent_mode', False):
+    if not config.silent_mode:
         input("⚠️ 警告：即将整理桌面文件。按回车键继续...")
     
-    # 获取桌面文件
-    all_items = os.listdir(desktop_path)
-    files = [f for f in all_items if os.path.isfile(os.path.join(desktop_path, f))]
-    
-    # 过滤需要跳过的文件
-    files = [f for f in files if not should_skip_file(f, config['skip_files'])]
+    # 获取桌面文件并过滤需要跳过的文件（scandir 自带文件类型，无需逐个 stat）
+    suffixes, skip_re = compile_skip_patterns(config.skip_files)
+    with os.scandir(desktop_path) as it:
+        files = [
+            entry for entry in it
+            if entry.is_file() and not should_skip_file(entry.name, suffixes, skip_re)
+        ]
     total_files = len(files)
     
-    # 创建分类文件夹
-    for category in config['categories']:
-        os.makedirs(os.path.join(desktop_path, category), exist_ok=True)
+    # 创建分类文件夹（含“其他”），循环内不再重复 mkdir/join
+    cat_paths = {
+        category: os.path.join(desktop_path, category)
+        for category in config.categories
+    }
+    for folder in cat_paths.values():
+        os.makedirs(folder, exist_ok=True)
+    others_path = os.path.join(desktop_path, "其他")
+    os.makedirs(others_path, exist_ok=True)
+    
+    # 扩展名 → 分类 反向索引（每个文件只需一次字典查找）
+    # 同一扩展名出现在多个分类时，与逐个分类匹配一样以第一个分类为准
+    ext_to_cat = {}
+    for category, extensions in config.categories.items():
+        for ext in extensions:
+            ext_to_cat.setdefault(ext, category)
     
-    # 准备恢复日志
-    backup_log = {
-        "timestamp": datetime.now().isoformat(),
-        "operations": [],
-        "desktop_path": desktop_path
+    # 预先生成每个分类的输出片段（状态前缀, 目标后缀），循环内只做字符串拼接
+    cat_labels = {
+        category: ("✅ 已移动: ", f" → {category}/\n")
+        for category in cat_paths
     }
+    others_label = ("⚠️ 未分类: ", " → 其他/\n")
+    
+    # 先在内存中完成分类，再把移动任务交给线程池
+    jobs = []
+    for entry in files:
+        filename = entry.name
+        category = ext_to_cat.get(os.path.splitext(filename)[1].lower())
+        if category is not None:
+            jobs.append((entry.path, cat_paths[category], filename, cat_labels[category]))
+        # 未分类文件处理
+        else:
+            jobs.append((entry.path, others_path, filename, others_label))
+    
+    # 恢复日志：首次成功移动时才创建，之后逐条写入，不在内存中累积
+    log_path = BACKUP_LOG_PATH
+    log_f = tmp_log_path = None
+    log_lock = threading.Lock()
+    
+    def move_and_log(src_path, dst_folder, filename):
+        """工作线程：移动单个文件并写入恢复日志"""
+        nonlocal log_f, tmp_log_path
+        dst_path = relocate_file(src_path, dst_folder, filename)
+        
+        # 记录操作（直接拼接 (原位置, 新位置) 两个字段，不为每次移动分配字典）
+        record = (b'{"original":' + _dumps(src_path)
+                  + b',"new_location":' + _dumps(dst_path) + b'}')
+        with log_lock:
+            if log_f is None:
+                log_f, tmp_log_path = open_backup_log(desktop_path)
+            else:
+                log_f.write(b",\n")
+            log_f.write(record)
+        return dst_path
+    
+    # 不记录日志时直接提交移动函数，工作线程内无需再判断配置
+    move_job = move_and_log if config.backup_log else relocate_file
     
     # 文件整理主循环
     print(f"\n📁 开始整理 {total_files} 个文件...")
     processed = 0
     
-    for filename in files:
-        try:
-            src_path = os.path.join(desktop_path, filename)
-            file_ext = os.path.splitext(filename)[1].lower()
-            
-            # 分类移动
-            moved = False
-            for category, extensions in config['categories'].items():
-                if file_ext in extensions:
-                    dst_folder = os.path.join(desktop_path, category)
-                    dst_path = os.path.join(dst_folder, filename)
-                    
-                    # 处理同名文件
-                    if os.path.exists(dst_path):
-                        base, ext = os.path.splitext(filename)
-                        new_name = f"{base}_{datetime.now().strftime('%H%M%S')}{ext}"
-                        dst_path = os.path.join(dst_folder, new_name)
-                    
-                    shutil.move(src_path, dst_path)
-                    
-                    # 记录操作
-                    if config['backup_log']:
-                        backup_log['operations'].append({
-                            "original": src_path,
-                            "new_location": dst_path
-                        })
-                    
-                    processed += 1
-                    print(f"[{processed}/{total_files}] ✅ 已移动: {filename} → {category}/")
-                    moved = True
-                    break
-            
-            # 未分类文件处理
-            if not moved:
-                others_path = os.path.join(desktop_path, "其他")
-                os.makedirs(others_path, exist_ok=True)
-                dst_path = os.path.join(others_path, filename)
-                shutil.move(src_path, dst_path)
-                
-                if config['backup_log']:
-                    backup_log['operations'].append({
-                        "original": src_path,
-                        "new_location": dst_path
-                    })
-                
+    # 逐文件输出先缓存，按批写入控制台，避免每行一次编码/刷新
+    lines = []
+    emit = lines.append
+    
+    def flush_lines():
+        if lines:
+            text = "".join(lines)
+            lines.clear()
+            try:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            except OSError:
+                pass  # 控制台输出失败（如管道已关闭）不影响文件整理
+    
+    executor = ThreadPoolExecutor(max_workers=MOVE_WORKERS)
+    try:
+        submit = executor.submit
+        futures = [
+            submit(move_job, src_path, dst_folder, filename)
+            for src_path, dst_folder, filename, _ in jobs
+        ]
+        # 按原顺序收集结果，输出与计数只在主线程进行
+        progress_tail = f"/{total_files}] "
+        for (_, _, filename, (head, tail)), future in zip(jobs, futures):
+            try:
+                future.result()
                 processed += 1
-                print(f"[{processed}/{total_files}] ⚠️ 未分类: {filename} → 其他/")
-
-        except PermissionError:
-            print(f"[{processed}/{total_files}] ❌ 权限不足，跳过: {filename}")
-        except FileNotFoundError:
-            print(f"[{processed}/{total_files}] ❌ 文件不存在: {filename}")
-        except Exception as e:
-            print(f"[{processed}/{total_files}] ❌ 处理失败: {filename} - 错误: {e}")
-    
-    # 保存恢复日志
-    if config['backup_log'] and backup_log['operations']:
-        log_path = os.path.join(desktop_path, "文件整理备份.json")
-        with open(log_path, 'w', encoding='utf-8') as f:
-            json.dump(backup_log, f, indent=2, ensure_ascii=False)
+                emit("[" + str(processed) + progress_tail + head + filename + tail)
+
+            except PermissionError:
+                emit(f"[{processed}/{total_files}] ❌ 权限不足，跳过: {filename}\n")
+            except FileNotFoundError:
+                emit(f"[{processed}/{total_files}] ❌ 文件不存在: {filename}\n")
+            except Exception as e:
+                emit(f"[{processed}/{total_files}] ❌ 处理失败: {filename} - 错误: {e}\n")
+            
+            if len(lines) >= OUTPUT_FLUSH_LINES:
+                flush_lines()
+    finally:
+        # 中断时取消未开始的任务，等待进行中的任务写完日志
+        executor.shutdown(wait=True, cancel_futures=True)
+        # 补全 JSON 结尾后替换到正式路径（中途中断时日志依然可用于恢复）
+        # 此时上一次的日志若在桌面上，已作为普通文件被移走
+        if log_f is not None:
+            log_f.write(b"\n]}\n")
+            log_f.close()
+            os.replace(tmp_log_path, log_path)
+        # 日志落盘后再输出剩余的控制台内容
+        flush_lines()
+    
+    if log_f is not None:
         print(f"\n📝 备份日志已保存到: {log_path}")
     
     # 完成统计
@@ -156,16 +299,18 @@ def restore_files(log_path=None):
     """恢复文件到原始位置"""
     # 自动查找日志文件
     if not log_path:
-        desktop_path = os.path.join(os.path.expanduser('~'), 'Desktop')
-        log_path = os.path.join(desktop_path, "文件整理备份.json")
+        log_path = BACKUP_LOG_PATH
     
     if not os.path.exists(log_path):
         print("❌ 找不到备份日志文件")
         return
     
     try:
-        with open(log_path, 'r', encoding='utf-8') as f:
-            backup_log = json.load(f)
+        # 内存映射日志文件直接解析，避免整份日志先读入为中间对象
+        with open(log_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            backup_log = _loads(view)
         
         operations = backup_log.get('operations', [])
         if not operations:
@@ -175,6 +320,13 @@ def restore_files(log_path=None):
         # 用户确认
         input(f"⚠️ 即将恢复 {len(operations)} 个文件. 按回车键继续...")
         
+        # 确保目标目录存在（每个不同的目录只创建一次）
+        for parent in {os.path.dirname(op["original"]) for op in operations}:
+            try:
+                os.makedirs(parent, exist_ok=True)
+            except OSError:
+                pass  # 由下方的移动操作报告失败
+        
         # 反向恢复文件
         success_count = 0
         for op in reversed(operations):
@@ -182,17 +334,17 @@ def restore_files(log_path=None):
                 src = op["new_location"]
                 dst = op["original"]
                 
-                # 确保目标目录存在
-                os.makedirs(os.path.dirname(dst), exist_ok=True)
-                
                 # 移动文件
+                move_file(src, dst)
+                success_count += 1
+                print(f"✅ 已恢复: {os.path.basename(dst)}")
+            
+            except FileNotFoundError as e:
+                # 源文件仍在时，说明是目标目录缺失（创建失败）
                 if os.path.exists(src):
-                    shutil.move(src, dst)
-                    success_count += 1
-                    print(f"✅ 已恢复: {os.path.basename(dst)}")
+                    print(f"❌ 恢复失败 {os.path.basename(dst)}: {str(e)}")
                 else:
                     print(f"⚠️ 文件不存在: {os.path.basename(src)}")
-            
             except Exception as e:
                 print(f"❌ 恢复失败 {os.path.basename(dst)}: {str(e)}")
         
@@ -200,7 +352,8 @@ def restore_files(log_path=None):
         os.remove(log_path)
         print(f"\n🎉 恢复完成! 成功恢复 {success_count}/{len(operations)} 个文件")
     
-    except json.JSONDecodeError:
+    except ValueError:
+        # 包括 JSON 解析错误和空日志文件（无法映射）
         print("❌ 备份日志格式错误")
     except Exception as e:
         print(f"❌ 恢复过程中出错: {str(e)}")
@@ -219,7 +372,7 @@ def main():
     # 加载配置
     config = load_config(args.config)
     if args.silent:
-        config['silent_mode'] = True
+        config = replace(config, silent_mode=True)
     
     # 执行操作
     if args.organize: